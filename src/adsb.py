@@ -1,20 +1,76 @@
 """Utils for ADS-B Data Fetching and Processing"""
 
 import asyncio
-import io
-import time
-from datetime import date, datetime, timedelta
+import concurrent.futures
+import contextlib
+import functools
+from datetime import date, datetime, time, timedelta
 
 import aiohttp
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from pycontrails import Flight
 from pycontrails.core import flight
 
 _API_BASE_URL = "https://api.contrails.org/v1/adsb/telemetry"
 
+# Columns of the /telemetry Parquet response that are used downstream. Only these
+# are decoded; the remaining columns (callsign, airports, scheduled times, etc.)
+# are skipped at read time.
+_KEEP_COLS = [
+    "timestamp",
+    "latitude",
+    "longitude",
+    "altitude_baro",
+    "icao_address",
+    "flight_id",
+    "tail_number",
+    "collection_type",
+]
+
+# Size of the chunks read from the response body while streaming it into Arrow.
+_CHUNK_SIZE_BYTES = 1 << 20
+
+# Maximum number of hourly requests in flight at once, and retry policy for
+# rate-limited (429) and server error (5xx) responses and for dropped or stalled
+# connections. Attempt n waits _RETRY_BACKOFF_S * 2**n seconds before the next.
+_MAX_CONCURRENT_REQUESTS = 8
+_MAX_ATTEMPTS = 3
+_RETRY_BACKOFF_S = 1
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_RETRY_ERRORS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+
+# An hour can take a while to download in full, so only connecting and each socket
+# read are bounded. A stalled hour then fails fast and is retried.
+_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+
+# Columns identifying a unique waypoint when dropping duplicates. flight_id is
+# included so a waypoint carrying an ID is never dropped in favour of a copy
+# without one.
+_WAYPOINT_KEY_COLS = ["icao_address", "timestamp", "latitude", "longitude", "flight_id"]
+
+_DAY = pd.Timedelta(days=1)
+_NS_PER_MINUTE = 60 * 1_000_000_000
+_MIDNIGHT_START = time(0, 0, 0)
+_MIDNIGHT_END = time(23, 59, 59)
+
+
+@functools.lru_cache(maxsize=None)
+def _midnight_window(midnight_threshold_mins: int) -> tuple[time, time]:
+    """Return the (rollover, holdover) time-of-day cutoffs for a midnight threshold."""
+    threshold = timedelta(minutes=midnight_threshold_mins)
+    # Any date works as an anchor; only the resulting time of day is used.
+    anchor = date(2000, 1, 2)
+    return (
+        (datetime.combine(anchor, _MIDNIGHT_END) - threshold).time(),
+        (datetime.combine(anchor, _MIDNIGHT_START) + threshold).time(),
+    )
+
+
 def generate_flight_id(
     start_timestamp: datetime,
     end_timestamp: datetime,
@@ -63,25 +119,20 @@ def generate_flight_id(
     Rollover: SPIRE-INFERRED-ABC123-2026-02-04-rollover-2026-02-05
     Standard: SPIRE-INFERRED-ABC123-1760035200-1760042400
     """
-    is_rollover = (
-        start_timestamp.time()
-        >= (pd.to_datetime("23:59:59") - pd.Timedelta(minutes=midnight_threshold_mins)).time()
-    )
-    is_holdover = (
-        end_timestamp.time()
-        <= (pd.to_datetime("00:00:00") + pd.Timedelta(minutes=midnight_threshold_mins)).time()
-    )
+    rollover_cutoff, holdover_cutoff = _midnight_window(midnight_threshold_mins)
+    is_rollover = start_timestamp.time() >= rollover_cutoff
+    is_holdover = end_timestamp.time() <= holdover_cutoff
     if is_holdover:
         generated_id = (
             f"SPIRE-INFERRED-{icao_address}-"
-            f"{start_timestamp.date() - pd.Timedelta(days=1)}-rollover-"
+            f"{start_timestamp.date() - _DAY}-rollover-"
             f"{start_timestamp.date()}"
         )
     elif is_rollover:
         generated_id = (
             f"SPIRE-INFERRED-{icao_address}-"
             f"{start_timestamp.date()}-rollover-"
-            f"{end_timestamp.date() + pd.Timedelta(days=1)}"
+            f"{end_timestamp.date() + _DAY}"
         )
     else:
         generated_id = (
@@ -92,62 +143,195 @@ def generate_flight_id(
     return generated_id
 
 
+def _wall_clock_and_utc(ts: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Split timestamps into naive wall-clock and naive UTC datetime64 arrays.
+
+    For timezone-naive input both arrays are the same values; this mirrors how
+    `datetime.time()`/`date()` read the wall clock while `timestamp()` treats
+    naive values as UTC.
+    """
+    if ts.dt.tz is None:
+        values = ts.to_numpy()
+        return values, values
+    return (
+        ts.dt.tz_localize(None).to_numpy(),
+        ts.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy(),
+    )
+
+
+def _generate_flight_ids(
+    start_timestamps: pd.Series,
+    end_timestamps: pd.Series,
+    icao_addresses: pd.Series,
+    midnight_threshold_mins: int,
+) -> pd.Series:
+    """Vectorized `generate_flight_id` over aligned Series of waypoint groups.
+
+    Returns a Series of flight IDs indexed like `start_timestamps`, identical to
+    calling `generate_flight_id` row by row.
+    """
+    threshold = np.timedelta64(midnight_threshold_mins, "m")
+    start_wall, start_utc = _wall_clock_and_utc(start_timestamps)
+    end_wall, end_utc = _wall_clock_and_utc(end_timestamps)
+    start_day = start_wall.astype("datetime64[D]")
+    end_day = end_wall.astype("datetime64[D]")
+
+    is_rollover = (start_wall - start_day) >= np.timedelta64(86399, "s") - threshold
+    is_holdover = (end_wall - end_day) <= threshold
+
+    start_date = np.datetime_as_string(start_day)
+    holdover_ids = np.char.add(
+        np.char.add(np.datetime_as_string(start_day - 1), "-rollover-"), start_date
+    )
+    rollover_ids = np.char.add(
+        np.char.add(start_date, "-rollover-"), np.datetime_as_string(end_day + 1)
+    )
+    standard_ids = np.char.add(
+        np.char.add(start_utc.astype("datetime64[s]").astype(np.int64).astype(str), "-"),
+        end_utc.astype("datetime64[s]").astype(np.int64).astype(str),
+    )
+    suffixes = np.select(
+        [is_holdover, is_rollover], [holdover_ids, rollover_ids], default=standard_ids
+    )
+    prefixes = np.char.add("SPIRE-INFERRED-", icao_addresses.to_numpy(dtype=str))
+    return pd.Series(
+        np.char.add(np.char.add(prefixes, "-"), suffixes),
+        index=start_timestamps.index,
+        dtype=object,
+    )
+
+
+def _read_parquet_buffer(buf: pa.Buffer) -> pa.Table:
+    """Decode an in-memory Parquet buffer into an Arrow table of the kept columns."""
+    return pq.read_table(pa.BufferReader(buf), columns=_KEEP_COLS)
+
+
 async def fetch_adsb_data_hour(
-    session: aiohttp.ClientSession, dt_hour: datetime, api_key: str
-) -> pd.DataFrame | None:
-    """Asynchronously fetch ADS-B data for a single hour."""
-    headers = {"accept": "application/vnd.apache.parquet", "x-api-key": api_key}
+    session: aiohttp.ClientSession,
+    dt_hour: datetime,
+    api_key: str,
+    executor: concurrent.futures.Executor | None = None,
+    semaphore: asyncio.Semaphore | None = None,
+) -> pa.Table | None:
+    """Asynchronously fetch ADS-B data for a single hour as an Arrow table.
+
+    The response body is streamed into an Arrow buffer and the Parquet decode is
+    run on `executor` (the event loop's default executor if None), so decoding
+    one hour overlaps with downloading the others. If given, `semaphore` is held
+    for the download only. Rate-limited (429) and server error (5xx) responses,
+    dropped connections and timeouts are retried with exponential backoff.
+
+    Raises
+    ------
+    aiohttp.ClientError | asyncio.TimeoutError
+        If the request still fails after retrying.
+    """
+    # Parquet is already compressed internally, so skip HTTP-level compression.
+    headers = {
+        "accept": "application/vnd.apache.parquet",
+        "accept-encoding": "identity",
+        "x-api-key": api_key,
+    }
     # The /telemetry endpoint uses 'date' param for the start of the hour
     params = {"date": dt_hour.strftime("%Y-%m-%dT%H")}
 
-    try:
-        async with session.get(_API_BASE_URL, headers=headers, params=params) as response:
-            response.raise_for_status()
-            content = await response.read()
-            if not content:
-                print(f"No content received for {dt_hour}")
-                return None
-            # Load Parquet from response content
-            return pd.read_parquet(io.BytesIO(content))
-    except aiohttp.ClientError as e:
-        print(f"Error fetching data for {dt_hour}: {e}")
-        return None
-    except Exception as e:
-        print(f"Error processing data for {dt_hour}: {e}")
+    async with semaphore or contextlib.nullcontext():
+        for attempt in range(_MAX_ATTEMPTS):
+            try:
+                async with session.get(_API_BASE_URL, headers=headers, params=params) as response:
+                    response.raise_for_status()
+                    sink = pa.BufferOutputStream()
+                    async for chunk in response.content.iter_chunked(_CHUNK_SIZE_BYTES):
+                        sink.write(chunk)
+                break
+            except aiohttp.ClientResponseError as e:
+                if e.status not in _RETRY_STATUSES or attempt == _MAX_ATTEMPTS - 1:
+                    raise
+                print(f"Retrying {dt_hour} after HTTP {e.status}")
+            except _RETRY_ERRORS as e:
+                if attempt == _MAX_ATTEMPTS - 1:
+                    raise
+                print(f"Retrying {dt_hour} after {type(e).__name__}: {e}")
+            await asyncio.sleep(_RETRY_BACKOFF_S * 2**attempt)
+
+    content = sink.getvalue()
+    if not content.size:
+        print(f"No content received for {dt_hour}")
         return None
+    # Load Parquet from response content, decoding only the needed columns
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, _read_parquet_buffer, content)
 
-async def fetch_all_day_data(target_date: date, api_key: str) -> pd.DataFrame:
-    """Fetch ADS-B data for the entire day asynchronously."""
-    start_datetime = datetime(target_date.year, target_date.month, target_date.day)
-    tasks = []
 
-    async with aiohttp.ClientSession() as session:
-        for hour in range(24):
-            dt_hour = start_datetime + timedelta(hours=hour)
-            tasks.append(fetch_adsb_data_hour(session, dt_hour, api_key))
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    dataframes = []
-    total_resp_size = 0
-    for res in results:
-        if isinstance(res, pd.DataFrame) and not res.empty:
-            dataframes.append(res)
-            total_resp_size += res.memory_usage(deep=True).sum()
-        elif isinstance(res, Exception):
-            print(f"An exception occurred during fetch: {res}")
+async def fetch_all_day_data(target_date: date, api_key: str) -> pd.DataFrame:
+    """Fetch ADS-B data for the entire day asynchronously.
 
-    if not dataframes:
+    Raises
+    ------
+    ValueError
+        If any hour fails to download or decode, or if no data was fetched.
+    """
+    start_datetime = datetime(target_date.year, target_date.month, target_date.day)
+    semaphore = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+    tables = {}
+    errors = {}
+
+    # Parquet decoding is CPU-bound and releases the GIL, so it runs on a thread
+    # pool while the remaining hours are still downloading.
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        # Pooled, kept-alive connections to the API host, one per request slot.
+        connector = aiohttp.TCPConnector(
+            limit=_MAX_CONCURRENT_REQUESTS,
+            limit_per_host=_MAX_CONCURRENT_REQUESTS,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+        )
+        async with aiohttp.ClientSession(
+            connector=connector, timeout=_REQUEST_TIMEOUT
+        ) as session:
+
+            async def fetch_hour(dt_hour: datetime) -> None:
+                try:
+                    table = await fetch_adsb_data_hour(
+                        session, dt_hour, api_key, executor, semaphore
+                    )
+                except Exception as e:
+                    print(f"An exception occurred during fetch for {dt_hour}: {e}")
+                    errors[dt_hour] = e
+                    return
+                if table is not None and table.num_rows:
+                    tables[dt_hour] = table
+
+            hours = [start_datetime + timedelta(hours=hour) for hour in range(24)]
+            for next_done in asyncio.as_completed([fetch_hour(dt_hour) for dt_hour in hours]):
+                await next_done
+
+    # A partial day would silently look like a complete one downstream.
+    if errors:
+        failed_hours = sorted(errors)
+        raise ValueError(
+            f"Failed to fetch data for {target_date} at hour(s) "
+            f"{', '.join(dt_hour.strftime('%H:%M') for dt_hour in failed_hours)}."
+        ) from errors[failed_hours[0]]
+    if not tables:
         raise ValueError("No data fetched. Check API key and date range.")
 
-    print(f"Total response size: {round(total_resp_size / 1000000, 2)} MB")
-    return pd.concat(dataframes, ignore_index=True)
+    # Concatenating Arrow tables only collects their chunks; no column data is
+    # copied, unlike pd.concat over per-hour DataFrames.
+    table = pa.concat_tables(
+        [tables[dt_hour] for dt_hour in sorted(tables)], promote_options="default"
+    )
+    print(f"Total response size: {round(table.nbytes / 1000000, 2)} MB")
+    # Columns stay Arrow-backed (pd.ArrowDtype): the DataFrame wraps the table's
+    # buffers without copying them, and strings are not materialized as Python
+    # objects.
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
 
 def clean_adsb_df(df: pd.DataFrame) -> pd.DataFrame:
     """Clean and prepare the raw ADS-B DataFrame."""
     if df.empty:
         return df
-    df = df.copy()
 
     # Rename columns to match pycontrails expectations
     # The API returns 'altitude_baro', 'icao_address', and 'timestamp'
@@ -159,8 +343,9 @@ def clean_adsb_df(df: pd.DataFrame) -> pd.DataFrame:
     }
     df = df.rename(columns=rename_map)
 
-    # Ensure time is datetime object
-    df["time"] = pd.to_datetime(df["time"], utc=True)
+    # Ensure time is datetime object. assign only replaces this one column, the
+    # others are shared with the input (copy-on-write) rather than copied.
+    df = df.assign(time=pd.to_datetime(df["time"], utc=True))
 
     # Select necessary columns
     columns = [
@@ -177,6 +362,115 @@ def clean_adsb_df(df: pd.DataFrame) -> pd.DataFrame:
     return df[df.columns.intersection(columns)]
 
 
+def _to_epoch_ns(ts: pd.Series) -> np.ndarray:
+    """Return timestamps as int64 nanoseconds since the epoch (UTC)."""
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_convert(None)
+    return ts.to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+
+def _take_or_missing(values: pd.Series, positions: np.ndarray, index: pd.Index) -> pd.Series:
+    """Take `values` at `positions`, filling positions of -1 with a missing value."""
+    return pd.Series(values.array.take(positions, allow_fill=True), index=index)
+
+
+def _is_sorted_by(codes: np.ndarray, timestamps: np.ndarray) -> bool:
+    """Return whether rows are already in ascending (code, timestamp) order."""
+    code_step = codes[1:] - codes[:-1]
+    return bool(np.all((code_step > 0) | ((code_step == 0) & (timestamps[1:] >= timestamps[:-1]))))
+
+
+def _nearest_valid_positions(
+    valid_codes: np.ndarray,
+    valid_ts: np.ndarray,
+    group_codes: np.ndarray,
+    group_start: np.ndarray,
+    group_end: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find, per group, the neighbouring waypoints with a flight ID of the same ICAO.
+
+    ICAO codes are integer codes and timestamps int64 nanoseconds. Waypoints are
+    ordered by a single int64 key (ICAO code * number of distinct timestamps +
+    timestamp rank) so that each lookup is one `np.searchsorted` over all groups.
+    Ranking the timestamps with `np.unique` always costs one full sort; only the
+    secondary sort of the keys is skipped when the waypoints are already ordered.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        Positions into the valid waypoints (-1 where there is no match) of the
+        first waypoint at or after the group start, the last waypoint at or before
+        the group start, and the first waypoint at or after the group end.
+    """
+    n_valid, n_groups = len(valid_ts), len(group_start)
+    unique_ts, ts_rank = np.unique(
+        np.concatenate([valid_ts, group_start, group_end]), return_inverse=True
+    )
+    ts_rank = ts_rank.reshape(-1)
+    n_ts = max(len(unique_ts), 1)
+    valid_keys = valid_codes * n_ts + ts_rank[:n_valid]
+    start_keys = group_codes * n_ts + ts_rank[n_valid : n_valid + n_groups]
+    end_keys = group_codes * n_ts + ts_rank[n_valid + n_groups :]
+
+    # Rows arrive ordered by (ICAO, time) in practice, so an O(n) check usually
+    # saves the argsort.
+    if np.all(valid_keys[:-1] <= valid_keys[1:]):
+        order = np.arange(n_valid)
+    else:
+        order = np.argsort(valid_keys, kind="stable")
+    valid_keys = valid_keys[order]
+    valid_codes = valid_codes[order]
+
+    def to_valid_positions(sorted_positions: np.ndarray) -> np.ndarray:
+        positions = np.full(n_groups, -1, dtype=np.intp)
+        in_bounds = np.flatnonzero((sorted_positions >= 0) & (sorted_positions < n_valid))
+        candidates = sorted_positions[in_bounds]
+        same_icao = valid_codes[candidates] == group_codes[in_bounds]
+        positions[in_bounds[same_icao]] = order[candidates[same_icao]]
+        return positions
+
+    return (
+        to_valid_positions(np.searchsorted(valid_keys, start_keys, side="left")),
+        to_valid_positions(np.searchsorted(valid_keys, start_keys, side="right") - 1),
+        to_valid_positions(np.searchsorted(valid_keys, end_keys, side="left")),
+    )
+
+
+def _select_valid_positions(
+    group_start: np.ndarray,
+    group_end: np.ndarray,
+    valid_ts: np.ndarray,
+    internal_pos: np.ndarray,
+    prev_pos: np.ndarray,
+    next_pos: np.ndarray,
+    threshold_ns: int,
+) -> np.ndarray:
+    """Pick, per group, the valid waypoint whose flight ID the group inherits.
+
+    A waypoint inside the group's start/end range wins. Otherwise the closer of
+    the previous/next waypoints within `threshold_ns` is used, preferring the
+    previous one on ties. Timestamps are int64 nanoseconds and positions are as
+    returned by `_nearest_valid_positions`; `valid_ts` must not be empty.
+
+    Returns
+    -------
+    np.ndarray
+        Positions into the valid waypoints, or -1 where an ID must be generated.
+    """
+    # Positions of -1 index the last waypoint; those lookups are masked out below.
+    has_internal = (internal_pos >= 0) & (valid_ts[internal_pos] <= group_end)
+    dist_prev = np.abs(group_start - valid_ts[prev_pos])
+    dist_next = np.abs(valid_ts[next_pos] - group_end)
+    valid_prev = (prev_pos >= 0) & (dist_prev <= threshold_ns)
+    valid_next = (next_pos >= 0) & (dist_next <= threshold_ns)
+    use_prev = valid_prev & (~valid_next | (dist_prev <= dist_next))
+    use_next = valid_next & ~use_prev
+
+    return np.select(
+        [has_internal, use_prev, use_next], [internal_pos, prev_pos, next_pos], default=-1
+    )
+
+
 def impute_flight_ids(
     df: pd.DataFrame,
     time_threshold_mins: int = 20,
@@ -219,125 +513,112 @@ def impute_flight_ids(
     Returns
     -------
     pd.Dataframe
-        A pandas DataFrame with missing flight IDs imputed.
+        A pandas DataFrame with missing flight IDs imputed. Rows keep their index
+        labels from `df`.
     """
     # Early return if there are no missing flight IDs (no need to impute).
     if not df["flight_id"].isna().any():
         return df
 
     # Drop:
-    # - Duplicated waypoints
+    # - Duplicated waypoints, i.e. same aircraft, time, position and flight ID.
     # - Waypoints without an ICAO address or timestamp (precautionary step).
-    df_imputed = df.copy()
-    df_imputed = df_imputed.drop_duplicates()
+    # drop_duplicates returns a new frame, so writing imputed IDs into it later
+    # does not modify `df`; no upfront copy is needed.
+    df_imputed = df.drop_duplicates(subset=_WAYPOINT_KEY_COLS, keep="first")
     df_imputed = df_imputed.dropna(subset=["icao_address", "timestamp"])
-    df_imputed = df_imputed.reset_index()
-
-    df_missing = df_imputed[df_imputed["flight_id"].isna()].sort_values(
-        ["icao_address", "timestamp"]
-    )
-    df_valid = df_imputed[~df_imputed["flight_id"].isna()].sort_values("timestamp")
+    # Arrow types an all-missing flight_id column (e.g. a satellite-only hour) as
+    # null, which cannot hold the imputed IDs; give it a string type instead.
+    flight_id_dtype = df_imputed["flight_id"].dtype
+    if isinstance(flight_id_dtype, pd.ArrowDtype) and pa.types.is_null(
+        flight_id_dtype.pyarrow_dtype
+    ):
+        df_imputed = df_imputed.astype({"flight_id": pd.ArrowDtype(pa.string())})
+
+    # ICAO addresses are handled as integer codes, ordered like the addresses,
+    # so sorting, group boundaries and neighbour lookups compare ints rather
+    # than strings. The returned frame keeps the caller's dtypes.
+    icao_codes, icao_uniques = pd.factorize(df_imputed["icao_address"], sort=True)
+    timestamps = _to_epoch_ns(df_imputed["timestamp"])
+    missing = df_imputed["flight_id"].isna().to_numpy()
+
+    # ADS-B feeds often arrive already ordered, so only sort when needed.
+    missing_rows = np.flatnonzero(missing)
+    if not _is_sorted_by(icao_codes[missing_rows], timestamps[missing_rows]):
+        missing_rows = missing_rows[
+            np.lexsort((timestamps[missing_rows], icao_codes[missing_rows]))
+        ]
+    missing_codes = icao_codes[missing_rows]
 
     # Group missing flight ID waypoints by ICAO and timestamps.
-    is_new_group = (df_missing["icao_address"] != df_missing["icao_address"].shift()) | (
-        df_missing["timestamp"].diff() > pd.Timedelta(minutes=20)
+    is_new_group = np.ones(len(missing_rows), dtype=bool)
+    is_new_group[1:] = (missing_codes[1:] != missing_codes[:-1]) | (
+        np.diff(timestamps[missing_rows]) > 20 * _NS_PER_MINUTE
     )
-    df_missing["group_id"] = is_new_group.cumsum()
-    groups = (
-        df_missing.groupby("group_id")
-        .agg(
-            icao_address=("icao_address", "first"),
-            group_start=("timestamp", "min"),
-            group_end=("timestamp", "max"),
-        )
-        .reset_index()
+    group_index = np.cumsum(is_new_group) - 1
+    # Waypoints are sorted by (ICAO, timestamp), so each group is a contiguous
+    # run whose first/last rows hold its ICAO address and start/end timestamps.
+    is_group_end = np.ones_like(is_new_group)
+    is_group_end[:-1] = is_new_group[1:]
+    first_rows = missing_rows[is_new_group]
+    last_rows = missing_rows[is_group_end]
+    groups = pd.DataFrame(
+        {
+            "icao_address": df_imputed["icao_address"].array[first_rows],
+            "group_start": df_imputed["timestamp"].array[first_rows],
+            "group_end": df_imputed["timestamp"].array[last_rows],
+        },
+        index=pd.RangeIndex(len(first_rows), name="group_id"),
     )
 
     # Search for waypoints with a non-null ID that are:
     # - In between the start/end timestamp of the group.
     # - Within time_threshold_mins of the start/end of the group.
-    start_group = groups.sort_values("group_start")
-    internal_match = pd.merge_asof(
-        start_group,
-        df_valid[["timestamp", "flight_id", "icao_address"]],
-        left_on="group_start",
-        right_on="timestamp",
-        by="icao_address",
-        direction="forward",
-        suffixes=("", "_internal"),
-    )
-    backward_match = pd.merge_asof(
-        start_group,
-        df_valid[["timestamp", "flight_id", "icao_address"]],
-        left_on="group_start",
-        right_on="timestamp",
-        by="icao_address",
-        direction="backward",
-        suffixes=("", "_prev"),
-    )
-    forward_match = pd.merge_asof(
-        groups.sort_values("group_end"),
-        df_valid[["timestamp", "flight_id", "icao_address"]],
-        left_on="group_end",
-        right_on="timestamp",
-        by="icao_address",
-        direction="forward",
-        suffixes=("", "_next"),
-    )
-
-    # Align all merges on group_id for comparison.
-    groups = groups.set_index("group_id")
-    internal_match = internal_match.set_index("group_id")
-    backward_match = backward_match.set_index("group_id")
-    forward_match = forward_match.set_index("group_id")
-
-    groups["internal_id"] = internal_match["flight_id"]
-    groups["internal_ts"] = internal_match["timestamp"]
-    groups["prev_id"] = backward_match["flight_id"]
-    groups["prev_ts"] = backward_match["timestamp"]
-    groups["next_id"] = forward_match["flight_id"]
-    groups["next_ts"] = forward_match["timestamp"]
-
-    # Check if a group has a waypoint inside its start/end timestamp range with
-    # a valid flight ID (since if it does, we want to use it).
-    has_internal = groups["internal_ts"] <= groups["group_end"]
-
-    groups["dist_prev"] = (groups["group_start"] - groups["prev_ts"]).abs()
-    groups["dist_next"] = (groups["next_ts"] - groups["group_end"]).abs()
-    groups["valid_prev"] = groups["dist_prev"] <= pd.Timedelta(minutes=time_threshold_mins)
-    groups["valid_next"] = groups["dist_next"] <= pd.Timedelta(minutes=time_threshold_mins)
-
-    # Begin assigning flight IDs.
-    groups["final_flight_id"] = pd.Series(np.nan, index=groups.index, dtype=object)
-    groups.loc[has_internal, "final_flight_id"] = groups.loc[has_internal, "internal_id"]
-    # If no internal IDs, use the chronologically closest ID within 20m of the
-    # start/end range.
-    missing_mask = groups["final_flight_id"].isna()
-
-    if missing_mask.any():
-        sub = groups.loc[missing_mask]
-        use_prev = sub["valid_prev"] & (~sub["valid_next"] | (sub["dist_prev"] <= sub["dist_next"]))
-        use_next = sub["valid_next"] & (~sub["valid_prev"] | (sub["dist_next"] < sub["dist_prev"]))
-        groups.loc[sub.index[use_prev], "final_flight_id"] = sub.loc[use_prev, "prev_id"]
-        groups.loc[sub.index[use_next], "final_flight_id"] = sub.loc[use_next, "next_id"]
+    # Prefer a waypoint inside the group's start/end range; otherwise use the
+    # chronologically closest one within time_threshold_mins of the range.
+    # Groups whose ICAO has no waypoint with a flight ID at all (e.g. satellite-
+    # only aircraft) are not searched and go straight to ID generation.
+    valid_codes = icao_codes[~missing]
+    group_codes = missing_codes[is_new_group]
+    searchable = np.bincount(valid_codes, minlength=len(icao_uniques))[group_codes] > 0
+    selected_pos = np.full(len(groups), -1, dtype=np.intp)
+    if searchable.any():
+        valid_ts = timestamps[~missing]
+        start_ts = _to_epoch_ns(groups["group_start"])[searchable]
+        end_ts = _to_epoch_ns(groups["group_end"])[searchable]
+        internal_pos, prev_pos, next_pos = _nearest_valid_positions(
+            valid_codes, valid_ts, group_codes[searchable], start_ts, end_ts
+        )
+        selected_pos[searchable] = _select_valid_positions(
+            start_ts,
+            end_ts,
+            valid_ts,
+            internal_pos,
+            prev_pos,
+            next_pos,
+            time_threshold_mins * _NS_PER_MINUTE,
+        )
+    groups["final_flight_id"] = _take_or_missing(
+        df_imputed["flight_id"][~missing], selected_pos, groups.index
+    ).astype(object)
 
     # For groups that have neither internal waypoints nor waypoints within
     # time_threshold_mins with a non-null ID, generate an ID for the
     # group.
     needs_gen_mask = groups["final_flight_id"].isna()
     if needs_gen_mask.any():
-        generated_ids = groups[needs_gen_mask].apply(
-            lambda row: generate_flight_id(
-                row["group_start"],
-                row["group_end"],
-                row["icao_address"],
-                midnight_threshold_mins,
-            ),
-            axis=1,
+        sub = groups.loc[needs_gen_mask]
+        groups.loc[needs_gen_mask, "final_flight_id"] = _generate_flight_ids(
+            sub["group_start"],
+            sub["group_end"],
+            sub["icao_address"],
+            midnight_threshold_mins,
         )
-        groups.loc[needs_gen_mask, "final_flight_id"] = generated_ids
-    df_missing["flight_id"] = df_missing["group_id"].map(groups["final_flight_id"])
-    df_imputed.loc[df_missing.index, "flight_id"] = df_missing["flight_id"]
+    # Groups are numbered 0..n-1 in order, so each waypoint's ID is a positional
+    # take. It is written by position too, as the index of `df` need not be unique.
+    df_imputed.iloc[missing_rows, df_imputed.columns.get_loc("flight_id")] = groups[
+        "final_flight_id"
+    ].to_numpy()[group_index]
 
     num_not_imputed = len(df_imputed[df_imputed["flight_id"].isna()])
     if num_not_imputed > 0:
@@ -1,9 +1,25 @@
 """Utilities for visualizing flights data."""
 
+import numpy as np
 import plotly.graph_objects as go
 
 from pycontrails import Flight
 
+# Upper bound on waypoints drawn on the globe. ADS-B traces are far denser than
+# an orthographic projection can show, and every point is serialized to JSON.
+_MAX_GLOBE_POINTS = 2000
+
+
+def _globe_point_indices(n_points: int) -> np.ndarray:
+    """Return evenly spaced positions of at most _MAX_GLOBE_POINTS of `n_points`.
+
+    The first and last positions are always kept, so the decimated path still
+    starts and ends where the flight does.
+    """
+    positions = np.linspace(0, n_points - 1, min(n_points, _MAX_GLOBE_POINTS))
+    return np.unique(positions.round().astype(int))
+
+
 def plot_flight_on_globe(flight: Flight):
     """Plot a pycontrails Flight object on a 3D Plotly globe centered and zoomed on the trajectory."""
     df = flight.dataframe
@@ -25,18 +41,21 @@ def plot_flight_on_globe(flight: Flight):
     zoom_scale = 1.0 / (max_range / 100.0)
     zoom_scale = max(1.0, min(zoom_scale, 20.0))  # Limit zoom to stay within reasonable bounds
 
+    # Decimate the trace to at most _MAX_GLOBE_POINTS waypoints
+    plot_df = df.iloc[_globe_point_indices(len(df))]
+
     fig = go.Figure()
 
     # Add the flight path
     fig.add_trace(
         go.Scattergeo(
-            lat=df["latitude"],
-            lon=df["longitude"],
+            lat=plot_df["latitude"],
+            lon=plot_df["longitude"],
             mode="lines+markers",
             line=dict(width=2, color="red"),
             marker=dict(size=5, color="blue"),
             name=f"Flight {fid}",
-            hovertext=df["time"].dt.strftime("%H:%M:%S"),
+            hovertext=plot_df["time"].dt.strftime("%H:%M:%S"),
         )
     )
 
@@ -1,10 +1,15 @@
+import asyncio
+import collections
+import contextlib
 import datetime
+import io
 import math
-from typing import Any
 from unittest import mock
 
+import numpy as np
 import pandas as pd
 import pytest
+from aiohttp import test_utils, web
 
 from pycontrails import Flight
 from src import adsb
@@ -46,27 +51,68 @@ def adsb_waypoints() -> pd.DataFrame:
     return df
 
 
+def _repeat_waypoint(df: pd.DataFrame, n: int) -> pd.DataFrame:
+    """Build a frame of `n` copies of the first waypoint in a single allocation."""
+    return df.iloc[np.zeros(n, dtype=int)].reset_index(drop=True)
+
+
+@contextlib.asynccontextmanager
+async def _telemetry_server(respond):
+    """Serve the /telemetry endpoint locally, answering with `respond(hour, attempt)`.
+
+    If `respond` returns None the connection is dropped partway through the body.
+    Yields a counter of requests per hour. Retry backoff is skipped.
+    """
+    attempts: collections.Counter = collections.Counter()
+
+    async def handler(request: web.Request) -> web.StreamResponse:
+        hour = request.query["date"]
+        attempts[hour] += 1
+        response = respond(hour, attempts[hour])
+        if response is not None:
+            return response
+        truncated = web.StreamResponse()
+        truncated.content_length = 1024
+        await truncated.prepare(request)
+        await truncated.write(b"\0" * 512)
+        request.transport.close()
+        return truncated
+
+    app = web.Application()
+    app.router.add_get("/telemetry", handler)
+    async with test_utils.TestServer(app) as server:
+        with (
+            mock.patch.object(adsb, "_API_BASE_URL", str(server.make_url("/telemetry"))),
+            mock.patch.object(adsb, "_RETRY_BACKOFF_S", 0),
+        ):
+            yield attempts
+
+
+def _parquet_bytes(df: pd.DataFrame) -> bytes:
+    buf = io.BytesIO()
+    df.to_parquet(buf)
+    return buf.getvalue()
+
+
 ##########
 # Tests
 ##########
 
 
 def test_does_not_impute_if_all_ids_filled_out(adsb_waypoints: pd.DataFrame) -> None:
-    df = adsb_waypoints.copy()
-    new_row = df.iloc[0].copy()
-    df = pd.concat([pd.DataFrame([new_row]), df], ignore_index=True)
-    with mock.patch.object(adsb, "generate_flight_id", autospec=True) as mock_generate_flight_id:
+    df = _repeat_waypoint(adsb_waypoints, 2)
+    with mock.patch.object(
+        adsb, "_generate_flight_ids", autospec=True
+    ) as mock_generate_flight_ids:
         adsb.impute_flight_ids(df)
-        mock_generate_flight_id.assert_not_called()
+        mock_generate_flight_ids.assert_not_called()
 
 
 def test_impute_backfills_if_temporal_alignment(adsb_waypoints: pd.DataFrame) -> None:
-    df = adsb_waypoints.copy()
-    new_row = df.iloc[0].copy()
-    new_row.collection_type = "satellite"
-    new_row.flight_id = None
-    new_row.timestamp -= pd.Timedelta(minutes=20)
-    df = pd.concat([pd.DataFrame([new_row]), df], ignore_index=True)
+    df = _repeat_waypoint(adsb_waypoints, 2)
+    df.loc[0, "collection_type"] = "satellite"
+    df.loc[0, "flight_id"] = None
+    df.loc[0, "timestamp"] -= pd.Timedelta(minutes=20)
 
     df = adsb.impute_flight_ids(df)
 
@@ -116,8 +162,7 @@ def test_impute_handles_holdover_flights(adsb_waypoints: pd.DataFrame) -> None:
 
 
 def test_impute_generates_on_icao_and_timestamp(adsb_waypoints: pd.DataFrame) -> None:
-    df = adsb_waypoints.copy()
-    df = pd.concat([pd.DataFrame([df.iloc[0].copy()]), df], ignore_index=True)
+    df = _repeat_waypoint(adsb_waypoints, 2)
     df["collection_type"] = "satellite"
     df["flight_id"] = None
     df.loc[1, "timestamp"] += pd.Timedelta(minutes=15)
@@ -132,40 +177,24 @@ def test_impute_generates_on_icao_and_timestamp(adsb_waypoints: pd.DataFrame) ->
 
 
 def test_impute_generates_if_no_temporal_alignment(adsb_waypoints: pd.DataFrame) -> None:
-    df = adsb_waypoints.copy()
-    new_row = df.iloc[0].copy()
-    new_row.collection_type = "satellite"
-    new_row.flight_id = None
-    new_row.timestamp -= pd.Timedelta(hours=20)
-    df = pd.concat([pd.DataFrame([new_row]), df], ignore_index=True)
+    df = _repeat_waypoint(adsb_waypoints, 2)
+    df.loc[0, "collection_type"] = "satellite"
+    df.loc[0, "flight_id"] = None
+    df.loc[0, "timestamp"] -= pd.Timedelta(hours=20)
+    new_timestamp = df.loc[0, "timestamp"]
 
     df = adsb.impute_flight_ids(df)
 
     assert (
         df.iloc[0]["flight_id"] == f"SPIRE-INFERRED-{df.iloc[0]['icao_address']}-"
-        f"{int(new_row.timestamp.timestamp())}-"
-        f"{int(new_row.timestamp.timestamp())}"
+        f"{int(new_timestamp.timestamp())}-"
+        f"{int(new_timestamp.timestamp())}"
     )
     assert df.iloc[1]["flight_id"] == "0e781b4b-4ae6-4a7d-ba58-9dab71185127"
 
 
 def test_impute_prioritizes_waypoints_inside_group_range(adsb_waypoints: pd.DataFrame) -> None:
-    df = adsb_waypoints.copy()
-    df = pd.concat(
-        [
-            pd.DataFrame(
-                [
-                    df.iloc[0].copy(),
-                    df.iloc[0].copy(),
-                    df.iloc[0].copy(),
-                    df.iloc[0].copy(),
-                    df.iloc[0].copy(),
-                ]
-            ),
-            df,
-        ],
-        ignore_index=True,
-    )
+    df = _repeat_waypoint(adsb_waypoints, 6)
     df["collection_type"] = "satellite"
     df["flight_id"] = None
     df.loc[1, "timestamp"] += pd.Timedelta(minutes=15)
@@ -183,22 +212,7 @@ def test_impute_prioritizes_waypoints_inside_group_range(adsb_waypoints: pd.Data
 
 
 def test_impute_handles_multiple_distinct_satellite_groups(adsb_waypoints: pd.DataFrame) -> None:
-    df = adsb_waypoints.copy()
-    df = pd.concat(
-        [
-            pd.DataFrame(
-                [
-                    df.iloc[0].copy(),
-                    df.iloc[0].copy(),
-                    df.iloc[0].copy(),
-                    df.iloc[0].copy(),
-                    df.iloc[0].copy(),
-                ]
-            ),
-            df,
-        ],
-        ignore_index=True,
-    )
+    df = _repeat_waypoint(adsb_waypoints, 6)
     df["collection_type"] = "satellite"
     df["flight_id"] = None
     # 0 and 1 should be generated due to temporal non-proximity to 2.
@@ -224,4 +238,137 @@ def test_impute_handles_multiple_distinct_satellite_groups(adsb_waypoints: pd.Da
     assert df.iloc[2]["flight_id"] == "0e781b4b-4ae6-4a7d-ba58-9dab71185127"
     assert df.iloc[2]["flight_id"] == df.iloc[3]["flight_id"]
     assert df.iloc[3]["flight_id"] == df.iloc[4]["flight_id"]
-    assert df.iloc[4]["flight_id"] == df.iloc[5]["flight_id"]
\ No newline at end of file
+    assert df.iloc[4]["flight_id"] == df.iloc[5]["flight_id"]
+
+
+def test_impute_handles_arrow_backed_columns(adsb_waypoints: pd.DataFrame) -> None:
+    df = _repeat_waypoint(adsb_waypoints, 2)
+    df.loc[0, "collection_type"] = "satellite"
+    df.loc[0, "flight_id"] = None
+    df.loc[0, "timestamp"] -= pd.Timedelta(minutes=20)
+    df = df[["timestamp", "latitude", "longitude", "icao_address", "flight_id"]]
+    df = df.convert_dtypes(dtype_backend="pyarrow")
+
+    df = adsb.impute_flight_ids(df)
+
+    assert df.iloc[0]["flight_id"] == df.iloc[1]["flight_id"]
+
+
+def test_impute_handles_arrow_backed_all_null_flight_ids(adsb_waypoints: pd.DataFrame) -> None:
+    df = _repeat_waypoint(adsb_waypoints, 2)
+    df["collection_type"] = "satellite"
+    df["flight_id"] = None
+    df.loc[1, "timestamp"] += pd.Timedelta(hours=12)
+    df = df[["timestamp", "latitude", "longitude", "icao_address", "flight_id"]]
+    df = df.astype({"flight_id": object}).convert_dtypes(dtype_backend="pyarrow")
+    assert str(df["flight_id"].dtype) == "null[pyarrow]"
+
+    df = adsb.impute_flight_ids(df)
+
+    assert (
+        df.iloc[0]["flight_id"]
+        == f"SPIRE-INFERRED-{df.iloc[0]['icao_address']}-2025-01-23-rollover-2025-01-24"
+    )
+    assert df.iloc[1]["flight_id"].startswith(f"SPIRE-INFERRED-{df.iloc[1]['icao_address']}-")
+
+
+def test_impute_drops_duplicate_waypoints_by_key(adsb_waypoints: pd.DataFrame) -> None:
+    df = _repeat_waypoint(adsb_waypoints, 2)
+    df["flight_id"] = None
+    df.loc[1, "nacp"] = 11
+
+    df = adsb.impute_flight_ids(df)
+
+    assert len(df) == 1
+
+
+def test_impute_preserves_index_labels(adsb_waypoints: pd.DataFrame) -> None:
+    df = _repeat_waypoint(adsb_waypoints, 2)
+    df.loc[0, "flight_id"] = None
+    df.loc[0, "timestamp"] -= pd.Timedelta(minutes=10)
+    df.index = pd.Index([5, 5])
+
+    df = adsb.impute_flight_ids(df)
+
+    assert list(df.index) == [5, 5]
+    assert "index" not in df.columns
+    assert df.iloc[0]["flight_id"] == df.iloc[1]["flight_id"]
+
+
+def test_vectorized_generate_matches_scalar_generate() -> None:
+    start = pd.Series(
+        pd.to_datetime(
+            ["2025-01-24 00:00:01", "2025-01-24 23:59:59", "2025-01-24 12:00:00"]
+        ).astype("datetime64[us]")
+    )
+    end = start + pd.Timedelta(minutes=5)
+    icao = pd.Series(["A00537", "A00538", "A00539"])
+
+    generated = adsb._generate_flight_ids(start, end, icao, 20)
+
+    assert list(generated) == [
+        adsb.generate_flight_id(s, e, i, 20) for s, e, i in zip(start, end, icao)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fetch_retries_server_errors(adsb_waypoints: pd.DataFrame) -> None:
+    payload = _parquet_bytes(adsb_waypoints)
+
+    def respond(hour: str, attempt: int) -> web.Response:
+        if hour == "2025-01-24T05" and attempt == 1:
+            return web.Response(status=503)
+        return web.Response(body=payload)
+
+    async with _telemetry_server(respond) as attempts:
+        df = await adsb.fetch_all_day_data(datetime.date(2025, 1, 24), "key")
+
+    assert attempts["2025-01-24T05"] == 2
+    assert len(df) == 24 * len(adsb_waypoints)
+
+
+@pytest.mark.asyncio
+async def test_fetch_retries_dropped_connections(adsb_waypoints: pd.DataFrame) -> None:
+    payload = _parquet_bytes(adsb_waypoints)
+
+    def respond(hour: str, attempt: int) -> web.Response | None:
+        if hour == "2025-01-24T05" and attempt == 1:
+            return None
+        return web.Response(body=payload)
+
+    async with _telemetry_server(respond) as attempts:
+        df = await adsb.fetch_all_day_data(datetime.date(2025, 1, 24), "key")
+
+    assert attempts["2025-01-24T05"] == 2
+    assert len(df) == 24 * len(adsb_waypoints)
+
+
+@pytest.mark.asyncio
+async def test_fetch_fails_day_on_client_error(adsb_waypoints: pd.DataFrame) -> None:
+    payload = _parquet_bytes(adsb_waypoints)
+
+    def respond(hour: str, attempt: int) -> web.Response:
+        if hour == "2025-01-24T07":
+            return web.Response(status=404)
+        return web.Response(body=payload)
+
+    async with _telemetry_server(respond) as attempts:
+        with pytest.raises(ValueError, match="07:00"):
+            await adsb.fetch_all_day_data(datetime.date(2025, 1, 24), "key")
+
+    assert attempts["2025-01-24T07"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_skips_empty_hours(adsb_waypoints: pd.DataFrame) -> None:
+    payload = _parquet_bytes(adsb_waypoints)
+
+    def respond(hour: str, attempt: int) -> web.Response:
+        if hour == "2025-01-24T03":
+            return web.Response(body=b"")
+        return web.Response(body=payload)
+
+    async with _telemetry_server(respond):
+        df = await adsb.fetch_all_day_data(datetime.date(2025, 1, 24), "key")
+
+    assert len(df) == 23 * len(adsb_waypoints)
@@ -0,0 +1,13 @@
+import pytest
+
+from src import flight_visualization
+
+
+@pytest.mark.parametrize("n_points", [0, 1, 2000, 2001, 4000, 1_000_003])
+def test_globe_point_indices_keep_endpoints_within_cap(n_points: int) -> None:
+    indices = flight_visualization._globe_point_indices(n_points)
+
+    assert len(indices) == min(n_points, flight_visualization._MAX_GLOBE_POINTS)
+    if n_points:
+        assert indices[0] == 0
+        assert indices[-1] == n_points - 1